@@ -3,5 +3,5 @@
 # Activate virtual environment
 source venv/bin/activate
 
-# Run Streamlit app
-streamlit run solar_optimizer_app.py --server.port 8501 --server.headless true
\ No newline at end of file
+# Run Streamlit app (post-rerun GC is disabled; the app collects after an analysis)
+streamlit run solar_optimizer_app.py --server.port 8501 --server.headless true --runner.postScriptGC false
\ No newline at end of file
@@ -10,13 +10,23 @@ and analyzing historical solar production data.
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
 from datetime import datetime, timedelta
-import io
+import gc
+import os
+import tempfile
+import xlsxwriter
 import numpy as np
 
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Largest archive response accepted; a year of hourly data is about 1 MB
+MAX_RESPONSE_BYTES = 32 * 1024 * 1024
+
 # Page config
 st.set_page_config(
     page_title="Solar Panel Optimizer",
@@ -26,307 +36,13 @@ st.set_page_config(
 )
 
 # Custom CSS for modern UI/UX
-st.markdown("""
-<style>
-    /* Main container styling */
-    .stApp {
-        background-color: #f8f9fa;
-    }
-    
-    /* Header styling */
-    .main-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 2rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-    }
-    
-    /* Card styling */
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 1rem;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 0.5rem 2rem;
-        border-radius: 25px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-    }
-    
-    /* Info box styling */
-    .info-box {
-        background: #e3f2fd;
-        border-left: 4px solid #2196f3;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-        color: #000000 !important;
-    }
-    
-    .info-box h4 {
-        color: #000000 !important;
-        margin-bottom: 0.5rem;
-    }
-    
-    .info-box ul {
-        color: #000000 !important;
-        margin: 0;
-    }
-    
-    .info-box li {
-        color: #000000 !important;
-    }
-    
-    /* Success box styling */
-    .success-box {
-        background: #e8f5e9;
-        border-left: 4px solid #4caf50;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-        color: #000000 !important;
-    }
-    
-    .success-box h4 {
-        color: #000000 !important;
-        margin-bottom: 0.5rem;
-    }
-    
-    .success-box ul {
-        color: #000000 !important;
-        margin: 0;
-    }
-    
-    .success-box li {
-        color: #000000 !important;
-    }
-    
-    /* Force all text to be black in custom divs */
-    .info-box *, .success-box * {
-        color: #000000 !important;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        color: #000000 !important;
-        font-weight: 600;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        color: #667eea !important;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        color: #ffffff !important;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        border-radius: 4px;
-    }
-    
-    .stTabs [aria-selected="true"] span {
-        color: #ffffff !important;
-    }
-    
-    /* Tab underline color */
-    .stTabs [data-baseweb="tab-highlight"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-    }
-    
-    /* Sidebar styling - force dark background with white text */
-    [data-testid="stSidebar"] {
-        background-color: #1e293b !important;
-    }
-    
-    [data-testid="stSidebar"] > div {
-        background-color: #1e293b !important;
-    }
-    
-    [data-testid="stSidebar"] [data-testid="stSidebarContent"] {
-        background-color: #1e293b !important;
-    }
-    
-    /* All sidebar text should be white */
-    [data-testid="stSidebar"] * {
-        color: #f8fafc !important;
-    }
-    
-    [data-testid="stSidebar"] h1, [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3, [data-testid="stSidebar"] h4,
-    [data-testid="stSidebar"] h5, [data-testid="stSidebar"] h6 {
-        color: #ffffff !important;
-    }
-    
-    [data-testid="stSidebar"] p, [data-testid="stSidebar"] label,
-    [data-testid="stSidebar"] .stMarkdown {
-        color: #f8fafc !important;
-    }
-    
-    /* Input fields in sidebar - dark background */
-    [data-testid="stSidebar"] input[type="number"],
-    [data-testid="stSidebar"] input[type="text"] {
-        background-color: #334155 !important;
-        color: #ffffff !important;
-        border-color: #475569 !important;
-    }
-    
-    /* Slider labels and values */
-    [data-testid="stSidebar"] .stSlider label {
-        color: #f8fafc !important;
-    }
-    
-    [data-testid="stSidebar"] .stSlider div[data-testid="stTickBarMax"],
-    [data-testid="stSidebar"] .stSlider div[data-testid="stTickBarMin"] {
-        color: #cbd5e1 !important;
-    }
-    
-    /* Expander in sidebar */
-    [data-testid="stSidebar"] .streamlit-expanderHeader {
-        background-color: #334155 !important;
-        color: #f8fafc !important;
-    }
-    
-    [data-testid="stSidebar"] .streamlit-expanderContent {
-        background-color: #2d3748 !important;
-    }
-    
-    /* Number input +/- buttons in sidebar - match slider text color */
-    [data-testid="stSidebar"] .stNumberInput button,
-    [data-testid="stSidebar"] button[title="Increment value"],
-    [data-testid="stSidebar"] button[title="Decrement value"] {
-        background-color: transparent !important;
-        color: #cbd5e1 !important;
-        border: 1px solid #475569 !important;
-    }
-    
-    [data-testid="stSidebar"] .stNumberInput button:hover,
-    [data-testid="stSidebar"] button[title="Increment value"]:hover,
-    [data-testid="stSidebar"] button[title="Decrement value"]:hover {
-        background-color: #334155 !important;
-        color: #f8fafc !important;
-    }
-    
-    /* Force the +/- text to match slider value color */
-    [data-testid="stSidebar"] .stNumberInput button span,
-    [data-testid="stSidebar"] .stNumberInput button div {
-        color: inherit !important;
-    }
-    
-    /* Info/Success/Error messages in sidebar - white text */
-    [data-testid="stSidebar"] .stAlert,
-    [data-testid="stSidebar"] [data-testid="stAlert"],
-    [data-testid="stSidebar"] .stInfo,
-    [data-testid="stSidebar"] .stSuccess,
-    [data-testid="stSidebar"] .stWarning,
-    [data-testid="stSidebar"] .stError {
-        color: #ffffff !important;
-    }
-    
-    [data-testid="stSidebar"] .stAlert p,
-    [data-testid="stSidebar"] [data-testid="stAlert"] p {
-        color: #ffffff !important;
-    }
-    
-    /* Main content area - keep black text */
-    .main .element-container {
-        color: #000000;
-    }
-    
-    /* Ensure all headings in main area are black */
-    .main h1, .main h2, .main h3, .main h4, .main h5, .main h6 {
-        color: #000000 !important;
-    }
-    
-    /* Ensure all paragraphs and lists in main area are black */
-    .main p, .main li, .main span {
-        color: #000000;
-    }
-    
-    /* Success/Error/Info/Warning messages - Alert components */
-    .stAlert {
-        color: #000000 !important;
-    }
-    
-    .stAlert > div {
-        color: #000000 !important;
-    }
-    
-    div[data-testid="stAlert"] {
-        color: #000000 !important;
-    }
-    
-    div[data-testid="stAlert"] * {
-        color: #000000 !important;
-    }
-    
-    /* Metric components - all variations */
-    [data-testid="metric-container"] {
-        color: #000000 !important;
-    }
-    
-    [data-testid="metric-container"] > div {
-        color: #000000 !important;
-    }
-    
-    [data-testid="metric-container"] label {
-        color: #000000 !important;
-    }
-    
-    [data-testid="metric-container"] [data-testid="stMetricValue"] {
-        color: #000000 !important;
-    }
-    
-    [data-testid="metric-container"] [data-testid="stMetricDelta"] svg {
-        display: none;
-    }
-    
-    [data-testid="stMetricDelta"] > div {
-        color: #000000 !important;
-    }
-    
-    /* Force all text in metric containers to be black */
-    div[data-testid="metric-container"] * {
-        color: #000000 !important;
-    }
-    
-    /* Additional targeting for metric text */
-    [data-testid="stMetricLabel"] {
-        color: #000000 !important;
-    }
-    
-    div[data-testid="stMetricValue"] > div {
-        color: #000000 !important;
-    }
-    
-    /* Target the specific metric delta container */
-    [data-testid="stMetricDeltaIcon-Up"], 
-    [data-testid="stMetricDeltaIcon-Down"] {
-        color: #000000 !important;
-    }
-    
-    /* Make sure the text after icons is black */
-    [data-testid="stMetricDelta"] span {
-        color: #000000 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_css():
+    """Read the app stylesheet (shared read-only string, not copied per call)"""
+    with open(os.path.join(ASSETS_DIR, 'styles.css'), encoding='utf-8') as f:
+        return f.read()
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # Header
 st.markdown("""
@@ -336,8 +52,8 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Sidebar for inputs
-with st.sidebar:
+# Sidebar for inputs, applied together on submit so each edit doesn't rerun the app
+with st.sidebar, st.form("inputs"):
     st.header("📍 Location & Settings")
     
     # Location inputs
@@ -449,6 +165,8 @@ with st.sidebar:
         - Premium systems: $1,200-2,000/kW
         - Includes panels, inverter, installation
         """)
+    
+    st.form_submit_button("✅ Apply Settings", type="primary")
 
 # Main content area
 tab1, tab2 = st.tabs(["🎯 Optimal Angles", "📊 Historical Analysis"])
@@ -509,79 +227,254 @@ def calculate_panel_area(system_size_kw, efficiency_percent):
     area = (system_size_kw * 1000) / (1000 * (efficiency_percent / 100))
     return area
 
-def fetch_weather_data(latitude, longitude):
-    """Fetch historical weather data"""
+def last_year_date_range():
+    """Return the start and end dates of the last year of archive data"""
     end_date = datetime.now() - timedelta(days=2)
     start_date = end_date - timedelta(days=365)
-    
+    return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so repeated API requests reuse the connection"""
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                          max_retries=Retry(total=3, backoff_factor=0.3)))
+    return session
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=128, show_spinner=False)
+def fetch_weather_data(latitude, longitude, start_date, end_date):
+    """Fetch historical weather data"""
     url = (f"https://archive-api.open-meteo.com/v1/archive?"
            f"latitude={latitude:.6f}&longitude={longitude:.6f}"
-           f"&start_date={start_date.strftime('%Y-%m-%d')}"
-           f"&end_date={end_date.strftime('%Y-%m-%d')}"
+           f"&start_date={start_date}"
+           f"&end_date={end_date}"
            f"&hourly=temperature_2m,diffuse_radiation,direct_normal_irradiance,shortwave_radiation"
            f"&timezone=auto")
     
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"API request failed with status {response.status_code}")
+    with get_session().get(url, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status {response.status_code}")
+        
+        # Read the body in chunks so an oversized response is rejected early
+        content = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            content += chunk
+            if len(content) > MAX_RESPONSE_BYTES:
+                raise Exception(f"API response larger than {MAX_RESPONSE_BYTES} bytes")
     
-    return response.json()
+    return orjson.loads(content)
+
+def hourly_array(hourly, key, default):
+    """Return an hourly API series as a float array, with missing values set to default"""
+    # None entries become NaN in a float array and are replaced in one pass
+    return np.nan_to_num(np.asarray(hourly[key], dtype=np.float64), nan=default)
 
-def calculate_solar_power(lat, lon, azimuth, tilt, direct_normal, diffuse, shortwave, 
-                         timestamp, temperature, temp_coefficient):
-    """Calculate solar panel power output"""
+def _solar_power_kernel(lat, azimuth, sin_tilt, cos_tilt, sky_view, ground_view,
+                        day_of_year, hour, direct_normal, diffuse, shortwave,
+                        temperatures, temp_coefficient):
+    """Calculate hourly power output; lat and azimuth are in radians"""
+    # Shared trig terms are computed once and intermediate results are updated
+    # in place, so each step doesn't allocate another full-year temporary
+    sin_lat, cos_lat = math.sin(lat), math.cos(lat)
+    
     # Solar position calculations
-    day_of_year = timestamp.timetuple().tm_yday
-    hour = timestamp.hour + timestamp.minute / 60.0
+    declination = np.radians((284 + day_of_year) * 360.0 / 365)
+    np.sin(declination, out=declination)
+    declination *= math.radians(23.45)
+    sin_dec, cos_dec = np.sin(declination), np.cos(declination)
+    
+    hour_angle = np.radians((hour - 12) * 15)
+    cos_hour_angle = np.cos(hour_angle)
+    
+    # Solar elevation as sine and cosine; cos(asin(x)) = sqrt(1 - x²)
+    sin_elevation = sin_dec * sin_lat
+    sin_elevation += cos_dec * cos_lat * cos_hour_angle
+    cos_elevation = np.sqrt(np.maximum(0, 1 - sin_elevation ** 2))
+    
+    # Simplified solar azimuth (only used through cos(sa - pa), so no wrap to [0, 2π))
+    solar_azimuth = np.arctan2(
+        -np.sin(hour_angle),
+        sin_dec / cos_dec * cos_lat - sin_lat * cos_hour_angle
+    )
     
-    declination = 23.45 * math.sin(math.radians((284 + day_of_year) * 360.0 / 365))
-    hour_angle = (hour - 12) * 15
+    # Angle of incidence: cos = sin(se)cos(pt) + cos(se)sin(pt)cos(sa - pa)
+    cos_incidence = solar_azimuth
+    cos_incidence -= azimuth
+    np.cos(cos_incidence, out=cos_incidence)
+    cos_incidence *= cos_elevation
+    cos_incidence *= sin_tilt
+    cos_incidence += sin_elevation * cos_tilt
+    cosine_factor = np.clip(cos_incidence, 0, 1, out=cos_incidence)
     
-    elevation = math.degrees(math.asin(
-        math.sin(math.radians(declination)) * math.sin(math.radians(lat)) +
-        math.cos(math.radians(declination)) * math.cos(math.radians(lat)) * 
-        math.cos(math.radians(hour_angle))
-    ))
+    # Total radiation on panel
+    power = direct_normal * cosine_factor
+    power += diffuse * sky_view
+    power += shortwave * ground_view
     
-    if elevation <= 0:
-        return 0
+    # Temperature effect
+    power *= 1 + (temperatures - 25) * (temp_coefficient / 100)
     
-    # Simplified solar azimuth
-    solar_azimuth = math.degrees(math.atan2(
-        -math.sin(math.radians(hour_angle)),
-        math.tan(math.radians(declination)) * math.cos(math.radians(lat)) -
-        math.sin(math.radians(lat)) * math.cos(math.radians(hour_angle))
-    ))
-    if solar_azimuth < 0:
-        solar_azimuth += 360
+    # Power output, zero while the sun is below the horizon
+    np.maximum(power, 0, out=power)
+    power[sin_elevation <= 0] = 0
     
-    # Angle of incidence calculations
-    sa = math.radians(solar_azimuth)
-    se = math.radians(elevation)
-    pa = math.radians(azimuth)
+    return power
+
+def calculate_solar_power_vec(lat, lon, azimuth, tilt, direct_normal, diffuse, shortwave,
+                              timestamps, temperatures, temp_coefficient):
+    """Calculate solar panel power output for arrays of hourly values"""
+    # Hours without any radiation (night) produce nothing, so only the
+    # remaining rows go through the kernel
+    daylight = np.flatnonzero((direct_normal > 0) | (diffuse > 0) | (shortwave > 0))
+    timestamps = timestamps[daylight]
+    day_of_year = timestamps.dayofyear.to_numpy()
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60.0
+    
+    # Panel orientation terms are constant for the whole run
     pt = math.radians(tilt)
-    
-    cos_incidence = (math.sin(se) * math.cos(pt) +
-                    math.cos(se) * math.sin(pt) * math.cos(sa - pa))
-    cos_incidence = max(-1, min(1, cos_incidence))
-    angle_of_incidence = math.degrees(math.acos(cos_incidence))
-    
-    cosine_factor = max(0, math.cos(math.radians(angle_of_incidence)))
-    
-    # Total radiation on panel
-    total_radiation = (
-        direct_normal * cosine_factor +
-        diffuse * (1 + math.cos(math.radians(tilt))) / 2 +
-        shortwave * 0.2 * (1 - math.cos(math.radians(tilt))) / 2
+    sin_tilt, cos_tilt = math.sin(pt), math.cos(pt)
+    sky_view = (1 + cos_tilt) / 2
+    ground_view = 0.2 * (1 - cos_tilt) / 2  # Albedo 0.2
+    
+    power = np.zeros(len(direct_normal))
+    power[daylight] = _solar_power_kernel(
+        math.radians(lat), math.radians(azimuth), sin_tilt, cos_tilt, sky_view, ground_view,
+        day_of_year, hour, direct_normal[daylight], diffuse[daylight], shortwave[daylight],
+        temperatures[daylight], temp_coefficient
     )
     
-    # Temperature effect
-    temp_effect = 1 + (temperature - 25) * (temp_coefficient / 100)
-    
-    # Power output
-    power = total_radiation * temp_effect
+    return power
+
+def build_solar_dataframe(latitude, longitude, start_date, end_date, system_size, system_efficiency):
+    """Build the hourly production DataFrame for the given location and system"""
+    data = fetch_weather_data(latitude, longitude, start_date, end_date)
+    hourly = data['hourly']
+    
+    # Process data, substituting defaults for missing values
+    timestamps = pd.to_datetime(hourly['time'], format='ISO8601')
+    temperatures = hourly_array(hourly, 'temperature_2m', 20.0)
+    diffuse_radiation = hourly_array(hourly, 'diffuse_radiation', 0.0)
+    direct_normal = hourly_array(hourly, 'direct_normal_irradiance', 0.0)
+    shortwave = hourly_array(hourly, 'shortwave_radiation', 0.0)
+    
+    # Calculate production
+    azimuth, tilt, _, _, _ = calculate_optimal_angles(latitude)
+    temp_coefficient = calculate_temperature_coefficient(latitude)
+    
+    power = calculate_solar_power_vec(
+        latitude, longitude, azimuth, tilt,
+        direct_normal, diffuse_radiation, shortwave,
+        timestamps, temperatures, temp_coefficient
+    )
     
-    return max(0, power)
+    # Scale by system size and efficiency
+    scaled_power = power * system_size * (system_efficiency / 100)
+    
+    # Create DataFrame in one pass: hourly W equals Wh, so no separate energy
+    # column, and a categorical date built from the distinct days rather than
+    # one object per hour. Values stay float64, since single precision shows
+    # up in the exports as digits like 6.400000095367432
+    day_codes, days = pd.factorize(timestamps.normalize())
+    df = pd.DataFrame({
+        'Timestamp': timestamps,
+        'Date': pd.Categorical.from_codes(day_codes, categories=days.date),
+        'Hour': timestamps.hour,
+        'Temperature (°C)': temperatures,
+        'Direct Normal Irradiance (W/m²)': direct_normal,
+        'Diffuse Radiation (W/m²)': diffuse_radiation,
+        'Global Horizontal Irradiance (W/m²)': shortwave,
+        'Power Output (W)': scaled_power
+    })
+    
+    return df
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=16, show_spinner=False)
+def analyze_production(latitude, longitude, start_date, end_date, system_size, system_efficiency):
+    """Return the hourly data with its daily and monthly summaries, cached per analysis"""
+    df = build_solar_dataframe(latitude, longitude, start_date, end_date, system_size, system_efficiency)
+    
+    # Resample the hourly series to days once, then roll the daily totals up to months
+    hourly_energy = df.set_index('Timestamp')['Power Output (W)']  # Hourly W = Wh
+    daily_energy = hourly_energy.resample('D').sum()
+    monthly_energy = daily_energy.resample('ME').sum()
+    
+    daily_df = pd.DataFrame({
+        'Date': daily_energy.index.date,
+        'Energy (Wh)': daily_energy.to_numpy(),
+        'Energy (kWh)': daily_energy.to_numpy() / 1000
+    })
+    monthly_summary = pd.DataFrame({
+        'Month': monthly_energy.index.strftime('%Y-%m'),
+        'Energy (Wh)': monthly_energy.to_numpy(),
+        'Energy (kWh)': monthly_energy.to_numpy() / 1000
+    })
+    
+    return df, daily_df, monthly_summary
+
+def downsample_minmax(x, y, n_out=1500):
+    """Reduce a series to at most n_out points, keeping each bucket's min and max"""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+    
+    # Split into equal buckets (the last one padded with the final point)
+    n_buckets = n_out // 2
+    size = -(-len(y) // n_buckets)
+    idx = np.arange(n_buckets * size).clip(max=len(y) - 1).reshape(n_buckets, size)
+    rows = np.arange(n_buckets)
+    lo = idx[rows, y[idx].argmin(axis=1)]
+    hi = idx[rows, y[idx].argmax(axis=1)]
+    
+    keep = np.unique(np.concatenate([lo, hi]))
+    return x[keep], y[keep]
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def csv_bytes(df):
+    """Encode the hourly data as CSV once per result instead of on every rerun"""
+    return df.to_csv(index=False, lineterminator='\n').encode('utf-8')
+
+def excel_serial_days(values):
+    """Convert a Series of dates or datetimes to Excel serial day numbers"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Convert each distinct day once, then expand by code
+        return excel_serial_days(pd.Series(values.cat.categories))[values.cat.codes.to_numpy()]
+    return (pd.to_datetime(values).to_numpy() - np.datetime64('1899-12-30')) / np.timedelta64(1, 'D')
+
+def write_sheet(workbook, sheet_name, df, datetime_formats):
+    """Write a DataFrame to a new worksheet row by row, as constant_memory mode requires"""
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    
+    # Dates are stored as serial day numbers shown with a column number format
+    for col, name in enumerate(df.columns):
+        if name in datetime_formats:
+            worksheet.set_column(col, col, None, workbook.add_format({'num_format': datetime_formats[name]}))
+    df = df.assign(**{name: excel_serial_days(df[name]) for name in datetime_formats})
+    
+    # itertuples yields one row of Python scalars at a time
+    worksheet.write_row(0, 0, df.columns, header_format)
+    for row, values in enumerate(df.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row, 0, values)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def excel_report(df, daily_df, monthly_summary, params):
+    """Build the Excel report once per analysis, streaming its rows through a temporary file"""
+    # In constant_memory mode each row is flushed to disk once the next one
+    # starts, so the workbook never holds every cell in memory at once
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'report.xlsx')
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False,
+                                              'tmpdir': tmp_dir})
+        write_sheet(workbook, 'Hourly Data', df,
+                    {'Timestamp': 'YYYY-MM-DD HH:MM:SS', 'Date': 'YYYY-MM-DD'})
+        write_sheet(workbook, 'Daily Summary', daily_df, {'Date': 'YYYY-MM-DD'})
+        write_sheet(workbook, 'Monthly Summary', monthly_summary, {})
+        write_sheet(workbook, 'System Parameters', pd.DataFrame([params]), {})
+        workbook.close()
+        
+        with open(path, 'rb') as f:
+            return f.read()
 
 # Tab 1: Optimal Angles
 with tab1:
@@ -703,8 +596,9 @@ with tab1:
         ))
         
         # Add angle arc
-        angle_x = [0.2 * math.cos(math.radians(i)) for i in range(0, int(tilt)+1)]
-        angle_y = [0.2 * math.sin(math.radians(i)) for i in range(0, int(tilt)+1)]
+        theta = np.radians(np.arange(int(tilt) + 1))
+        angle_x = 0.2 * np.cos(theta)
+        angle_y = 0.2 * np.sin(theta)
         
         fig2.add_trace(go.Scatter(
             x=angle_x, y=angle_y,
@@ -737,55 +631,17 @@ with tab2:
     if st.button("🔄 Analyze Historical Data", type="primary"):
         with st.spinner("Fetching weather data and calculating production..."):
             try:
-                # Fetch weather data
-                data = fetch_weather_data(latitude, longitude)
-                hourly = data['hourly']
-                
-                # Process data
-                times = hourly['time']
-                temperatures = hourly['temperature_2m']
-                diffuse_radiation = hourly['diffuse_radiation']
-                direct_normal = hourly['direct_normal_irradiance']
-                shortwave = hourly['shortwave_radiation']
-                
-                # Calculate production
+                # Calculate production (cached per location, date range and system)
+                start_date, end_date = last_year_date_range()
+                results = analyze_production(
+                    round(latitude, 4), round(longitude, 4), start_date, end_date,
+                    system_size, system_efficiency
+                )
                 azimuth, tilt, _, _, _ = calculate_optimal_angles(latitude)
                 temp_coefficient = calculate_temperature_coefficient(latitude)
                 
-                excel_data = []
-                for i in range(len(times)):
-                    timestamp = datetime.fromisoformat(times[i].replace('T', ' '))
-                    
-                    temp = temperatures[i] if temperatures[i] is not None else 20
-                    diffuse = diffuse_radiation[i] if diffuse_radiation[i] is not None else 0
-                    direct = direct_normal[i] if direct_normal[i] is not None else 0
-                    sw = shortwave[i] if shortwave[i] is not None else 0
-                    
-                    power = calculate_solar_power(
-                        latitude, longitude, azimuth, tilt,
-                        direct, diffuse, sw, timestamp, temp, temp_coefficient
-                    )
-                    
-                    # Scale by system size and efficiency
-                    scaled_power = power * system_size * (system_efficiency / 100)
-                    
-                    excel_data.append({
-                        'Timestamp': timestamp,
-                        'Date': timestamp.date(),
-                        'Hour': timestamp.hour,
-                        'Temperature (°C)': temp,
-                        'Direct Normal Irradiance (W/m²)': direct,
-                        'Diffuse Radiation (W/m²)': diffuse,
-                        'Global Horizontal Irradiance (W/m²)': sw,
-                        'Power Output (W)': scaled_power,
-                        'Energy (Wh)': scaled_power
-                    })
-                
-                # Create DataFrame
-                df = pd.DataFrame(excel_data)
-                
-                # Store in session state
-                st.session_state['solar_data'] = df
+                # Store in session state, so reruns never depend on the shared cache
+                st.session_state['solar_results'] = results
                 st.session_state['system_params'] = {
                     'latitude': latitude,
                     'longitude': longitude,
@@ -799,14 +655,18 @@ with tab2:
                     'system_cost_per_kw': system_cost_per_kw
                 }
                 
+                # run_web_app.sh turns off Streamlit's full GC after every rerun;
+                # collect once here, after the only allocation-heavy step
+                gc.collect()
+                
                 st.markdown('<div style="background-color: #d4edda; border: 1px solid #c3e6cb; border-radius: 4px; padding: 12px; margin: 8px 0; color: #000000 !important;"><strong style="color: #000000;">✅ Analysis complete! Data is ready for visualization and download.</strong></div>', unsafe_allow_html=True)
                 
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
     
     # Display results if data exists
-    if 'solar_data' in st.session_state:
-        df = st.session_state['solar_data']
+    if 'solar_results' in st.session_state:
+        df, daily_df, monthly_summary = st.session_state['solar_results']
         params = st.session_state['system_params']
         electricity_rate = params.get('electricity_rate', 0.12)  # Use stored rate or default
         
@@ -816,12 +676,9 @@ with tab2:
         # Summary metrics
         col1, col2, col3, col4 = st.columns(4)
         
-        total_energy = df['Energy (Wh)'].sum() / 1000  # Convert to kWh
+        total_energy = daily_df['Energy (Wh)'].sum() / 1000  # Convert to kWh
         daily_avg = total_energy / 365
         
-        # Create daily summary
-        daily_df = df.groupby('Date')['Energy (Wh)'].sum().reset_index()
-        daily_df['Energy (kWh)'] = daily_df['Energy (Wh)'] / 1000
         peak_day = daily_df.loc[daily_df['Energy (kWh)'].idxmax()]
         
         with col1:
@@ -864,30 +721,48 @@ with tab2:
         st.subheader("📈 Production Analysis")
         
         # Monthly production chart
-        monthly_df = df.copy()
-        monthly_df['Month'] = pd.to_datetime(monthly_df['Date']).dt.to_period('M')
-        monthly_summary = monthly_df.groupby('Month')['Energy (Wh)'].sum().reset_index()
-        monthly_summary['Energy (kWh)'] = monthly_summary['Energy (Wh)'] / 1000
-        monthly_summary['Month'] = monthly_summary['Month'].astype(str)
-        
-        fig_monthly = px.bar(
-            monthly_summary,
-            x='Month',
-            y='Energy (kWh)',
-            title='Monthly Energy Production',
-            labels={'Energy (kWh)': 'Energy (kWh)', 'Month': 'Month'},
-            color='Energy (kWh)',
-            color_continuous_scale='viridis'
-        )
+        fig_monthly = go.Figure(go.Bar(
+            x=monthly_summary['Month'].to_numpy(),
+            y=monthly_summary['Energy (kWh)'].to_numpy(),
+            marker=dict(
+                color=monthly_summary['Energy (kWh)'].to_numpy(),
+                colorscale='Viridis',
+                colorbar=dict(title='Energy (kWh)')
+            )
+        ))
         
         fig_monthly.update_layout(
+            title='Monthly Energy Production',
             height=400,
             showlegend=False,
+            xaxis_title='Month',
+            yaxis_title='Energy (kWh)',
             xaxis_tickangle=-45
         )
         
         st.plotly_chart(fig_monthly, use_container_width=True)
         
+        # Hourly production chart, downsampled so the browser never draws all 8760 points
+        hourly_x, hourly_y = downsample_minmax(
+            df['Timestamp'].to_numpy(), df['Power Output (W)'].to_numpy()
+        )
+        
+        fig_hourly = go.Figure(go.Scatter(
+            x=hourly_x, y=hourly_y,
+            mode='lines',
+            line=dict(color='#667eea', width=1),
+            showlegend=False
+        ))
+        
+        fig_hourly.update_layout(
+            title='Hourly Power Output',
+            height=400,
+            xaxis_title='Date',
+            yaxis_title='Power (W)'
+        )
+        
+        st.plotly_chart(fig_hourly, use_container_width=True)
+        
         # Add cost savings table section
         st.divider()
         st.subheader("💰 Cost Savings Analysis")
@@ -978,38 +853,19 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Prepare Excel file
-            output = io.BytesIO()
-            
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                # Hourly data
-                df.to_excel(writer, sheet_name='Hourly Data', index=False)
-                
-                # Daily summary
-                daily_df.to_excel(writer, sheet_name='Daily Summary', index=False)
-                
-                # Monthly summary
-                monthly_summary.to_excel(writer, sheet_name='Monthly Summary', index=False)
-                
-                # System parameters
-                params_df = pd.DataFrame([params])
-                params_df.to_excel(writer, sheet_name='System Parameters', index=False)
-            
-            excel_data = output.getvalue()
-            
+            # Excel file (built once per analysis)
             st.download_button(
                 label="📊 Download Excel Report",
-                data=excel_data,
+                data=excel_report(df, daily_df, monthly_summary, params),
                 file_name=f"solar_analysis_{params['latitude']}_{params['longitude']}_{datetime.now().strftime('%Y%m%d')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
         
         with col2:
             # CSV download
-            csv = df.to_csv(index=False)
             st.download_button(
                 label="📄 Download CSV Data",
-                data=csv,
+                data=csv_bytes(df),
                 file_name=f"solar_data_{params['latitude']}_{params['longitude']}_{datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv"
             )
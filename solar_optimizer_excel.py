@@ -19,12 +19,40 @@ Assumptions:
 - Temperature coefficient: -0.4%/°C (typical for silicon panels)
 """
 
+import functools
 import requests
-import json
-import math
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
+COMPASS_DIRECTIONS = ("North", "Northeast", "East", "Southeast",
+                      "South", "Southwest", "West", "Northwest")
+
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Model constants
+EARTH_TILT = 23.45            # Axial tilt in degrees, the declination amplitude
+ALBEDO = 0.2                  # Ground reflectance
+TEMP_COEFFICIENT = -0.004     # Relative power change per °C above 25°C
+SYSTEM_EFFICIENCY = 0.95      # Inverter, wiring and soiling losses
+
+# Largest archive response accepted; a year of hourly data is about 1 MB
+MAX_RESPONSE_BYTES = 32 * 1024 * 1024
+
+def _make_session():
+    """HTTP session that keeps connections alive and retries failed connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                          max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    return session
+
+_SESSION = _make_session()
+
 def main():
     print("=== Solar Panel Optimizer ===")
     latitude = float(input("Enter latitude: "))
@@ -110,75 +138,33 @@ def analyze_last_year_production(latitude, longitude, azimuth, tilt):
     end_date = datetime.now() - timedelta(days=2)  # API has 2-day delay
     start_date = end_date - timedelta(days=365)
     
-    # Build API URL
-    url = (f"https://archive-api.open-meteo.com/v1/archive?"
-           f"latitude={latitude:.6f}&longitude={longitude:.6f}"
-           f"&start_date={start_date.strftime('%Y-%m-%d')}"
-           f"&end_date={end_date.strftime('%Y-%m-%d')}"
-           f"&hourly=temperature_2m,diffuse_radiation,direct_normal_irradiance,shortwave_radiation"
-           f"&timezone=auto")
+    # Fetch data (cached per location and date range)
+    hourly = fetch_archive(latitude, longitude,
+                           start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
     
-    # Fetch data
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"API request failed with status {response.status_code}")
-    
-    data = response.json()
-    hourly = data['hourly']
-    
-    # Process the data
-    times = hourly['time']
-    temperatures = hourly['temperature_2m']
-    diffuse_radiation = hourly['diffuse_radiation']
-    direct_normal = hourly['direct_normal_irradiance']
-    shortwave = hourly['shortwave_radiation']
-    
-    # Calculate production
-    total_energy = 0
-    monthly_energy = [0] * 12
-    daily_energy = {}
-    debug_counter = 0
-    
-    # Lists to store data for Excel export
-    excel_data = []
-    
-    for i in range(len(times)):
-        # Parse timestamp
-        timestamp = datetime.fromisoformat(times[i].replace('T', ' '))
-        
-        # Get values (handle None values)
-        temp = temperatures[i] if temperatures[i] is not None else 20
-        diffuse = diffuse_radiation[i] if diffuse_radiation[i] is not None else 0
-        direct = direct_normal[i] if direct_normal[i] is not None else 0
-        sw = shortwave[i] if shortwave[i] is not None else 0
-        
-        # Calculate power
-        power = calculate_power(latitude, longitude, azimuth, tilt,
-                              direct, diffuse, sw, timestamp, temp)
-        
-        # Store data for Excel export
-        excel_data.append({
-            'Timestamp': timestamp,
-            'Date': timestamp.date(),
-            'Hour': timestamp.hour,
-            'Temperature (°C)': temp,
-            'Direct Normal Irradiance (W/m²)': direct,
-            'Diffuse Radiation (W/m²)': diffuse,
-            'Global Horizontal Irradiance (W/m²)': sw,
-            'Power Output (W)': power,
-            'Energy (Wh)': power  # Hourly data, so W = Wh
-        })
-        
-        total_energy += power
-        monthly_energy[timestamp.month - 1] += power
-        
-        # Track daily totals
-        date_key = timestamp.date()
-        daily_energy[date_key] = daily_energy.get(date_key, 0) + power
+    # Process the data (missing values replaced in one pass per series)
+    timestamps = pd.to_datetime(hourly['time'], format='ISO8601')
+    # Day of each hour as a code into the distinct days (no per-hour date objects)
+    day_codes, days = pd.factorize(timestamps.normalize())
+    temperatures = np.nan_to_num(np.asarray(hourly['temperature_2m'], dtype=np.float64), nan=20)
+    diffuse_radiation = np.nan_to_num(np.asarray(hourly['diffuse_radiation'], dtype=np.float64), nan=0)
+    direct_normal = np.nan_to_num(np.asarray(hourly['direct_normal_irradiance'], dtype=np.float64), nan=0)
+    shortwave = np.nan_to_num(np.asarray(hourly['shortwave_radiation'], dtype=np.float64), nan=0)
+    
+    # Calculate production for every hour at once
+    power = calculate_power(latitude, longitude, azimuth, tilt,
+                            direct_normal, diffuse_radiation, shortwave, timestamps, temperatures)
+    
+    total_energy = power.sum(dtype=np.float64)
+    monthly_energy = np.bincount(timestamps.month.to_numpy() - 1, weights=power, minlength=12)
+    
+    # Track daily totals
+    daily_energy = np.bincount(day_codes, weights=power, minlength=len(days))
     
     # Find peak day
-    peak_day = max(daily_energy, key=daily_energy.get)
-    peak_energy = daily_energy[peak_day]
+    peak = daily_energy.argmax()
+    peak_day = days[peak].date()
+    peak_energy = daily_energy[peak]
     
     # Display results
     print("\nPRODUCTION ANALYSIS (Last 12 Months):")
@@ -188,42 +174,52 @@ def analyze_last_year_production(latitude, longitude, azimuth, tilt):
     print(f"Peak Daily Production: {peak_energy/1000:.1f} kWh on {peak_day}")
     
     print("\nMonthly Breakdown (kWh):")
-    global month_names
-    month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-                   "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
     for i in range(12):
-        print(f"{month_names[i]}: {monthly_energy[i]/1000:.0f} kWh")
+        print(f"{MONTH_NAMES[i]}: {monthly_energy[i]/1000:.0f} kWh")
     
     print("\nNOTE: Based on 1kW panel capacity at standard conditions")
     print("Multiply by your actual system size for real production estimates")
     
     # Create DataFrame and export to Excel
-    df = pd.DataFrame(excel_data)
+    df = pd.DataFrame({
+        'Timestamp': timestamps,
+        'Date': timestamps.normalize(),
+        'Hour': timestamps.hour,
+        'Temperature (°C)': temperatures,
+        'Direct Normal Irradiance (W/m²)': direct_normal,
+        'Diffuse Radiation (W/m²)': diffuse_radiation,
+        'Global Horizontal Irradiance (W/m²)': shortwave,
+        'Power Output (W)': power,
+        'Energy (Wh)': power  # Hourly data, so W = Wh
+    })
     
     # Create daily summary
-    daily_df = df.groupby('Date').agg({
+    daily_df = df.resample('D', on='Timestamp').agg({
         'Energy (Wh)': 'sum',
         'Temperature (°C)': 'mean',
         'Direct Normal Irradiance (W/m²)': 'mean',
         'Diffuse Radiation (W/m²)': 'mean',
         'Global Horizontal Irradiance (W/m²)': 'mean'
     }).round(2)
+    daily_df.index = pd.Index(daily_df.index.date, name='Date')
     daily_df.rename(columns={'Energy (Wh)': 'Daily Energy (Wh)'}, inplace=True)
     daily_df['Daily Energy (kWh)'] = (daily_df['Daily Energy (Wh)'] / 1000).round(3)
     
     # Save to Excel with multiple sheets
     filename = f"solar_production_{latitude}_{longitude}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+    with pd.ExcelWriter(filename, engine='xlsxwriter',
+                        engine_kwargs={'options': {'strings_to_urls': False, 'in_memory': True}}) as writer:
         # Hourly data sheet
-        df.to_excel(writer, sheet_name='Hourly Data', index=False)
+        write_hourly_sheet(writer, 'Hourly Data', df,
+                           {'Timestamp': 'YYYY-MM-DD HH:MM:SS', 'Date': 'YYYY-MM-DD'})
         
         # Daily summary sheet
         daily_df.to_excel(writer, sheet_name='Daily Summary')
         
         # Monthly summary sheet
         monthly_df = pd.DataFrame({
-            'Month': month_names,
-            'Energy (kWh)': [energy/1000 for energy in monthly_energy]
+            'Month': list(MONTH_NAMES),
+            'Energy (kWh)': monthly_energy / 1000
         })
         monthly_df.to_excel(writer, sheet_name='Monthly Summary', index=False)
         
@@ -231,17 +227,77 @@ def analyze_last_year_production(latitude, longitude, azimuth, tilt):
         params_df = pd.DataFrame({
             'Parameter': ['Latitude', 'Longitude', 'Panel Azimuth', 'Panel Tilt', 
                          'System Capacity', 'System Efficiency', 'Temperature Coefficient'],
-            'Value': [latitude, longitude, azimuth, tilt, '1 kW', '95%', '-0.4%/°C'],
+            'Value': [latitude, longitude, azimuth, tilt, '1 kW',
+                      f'{SYSTEM_EFFICIENCY:.0%}', f'{TEMP_COEFFICIENT:.1%}/°C'],
             'Unit': ['degrees', 'degrees', 'degrees', 'degrees', '', '', '']
         })
         params_df.to_excel(writer, sheet_name='System Parameters', index=False)
     
     print(f"\nData exported to: {filename}")
 
+def write_hourly_sheet(writer, sheet_name, df, datetime_formats):
+    """
+    Write a DataFrame of hourly values straight to an xlsxwriter worksheet.
+    
+    pandas' to_excel builds and styles a cell object for every value, which
+    dominates the export time for a full year of hours. Here each column is
+    converted to plain numbers once (datetime columns to Excel serial days,
+    shown with the number format given in datetime_formats) and written
+    with write_number.
+    """
+    workbook = writer.book
+    worksheet = workbook.add_worksheet(sheet_name)
+    
+    # Same header style as pandas uses
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    worksheet.write_row(0, 0, df.columns, header_format)
+    
+    excel_epoch = np.datetime64('1899-12-30')
+    for col, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        number_format = None
+        if name in datetime_formats:
+            values = (values - excel_epoch) / np.timedelta64(1, 'D')
+            number_format = workbook.add_format({'num_format': datetime_formats[name]})
+        
+        write_number = worksheet.write_number
+        for row, value in enumerate(values.tolist(), start=1):
+            write_number(row, col, value, number_format)
+
+@functools.lru_cache(maxsize=32)
+def fetch_archive(latitude, longitude, start_date, end_date):
+    """
+    Fetch hourly archive weather data from Open-Meteo.
+    
+    Responses are cached per (latitude, longitude, start_date, end_date), so
+    repeated analyses of the same location reuse the download. The returned
+    dict is shared between callers and must not be modified.
+    """
+    # Build API URL
+    url = (f"https://archive-api.open-meteo.com/v1/archive?"
+           f"latitude={latitude:.6f}&longitude={longitude:.6f}"
+           f"&start_date={start_date}"
+           f"&end_date={end_date}"
+           f"&hourly=temperature_2m,diffuse_radiation,direct_normal_irradiance,shortwave_radiation"
+           f"&timezone=auto")
+    
+    with _SESSION.get(url, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"API request failed with status {response.status_code}")
+        
+        # Read the body in chunks so an oversized response is rejected early
+        content = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            content += chunk
+            if len(content) > MAX_RESPONSE_BYTES:
+                raise Exception(f"API response larger than {MAX_RESPONSE_BYTES} bytes")
+    
+    return orjson.loads(content)['hourly']
+
 def calculate_power(lat, lon, azimuth, tilt, direct_normal, diffuse, shortwave, 
-                   timestamp, temperature):
+                   timestamps, temperature):
     """
-    Calculate instantaneous solar panel power output.
+    Calculate solar panel power output for a series of hours.
     
     This function simulates the power generation of a solar panel based on:
     - Sun position (calculated from location and time)
@@ -249,6 +305,9 @@ def calculate_power(lat, lon, azimuth, tilt, direct_normal, diffuse, shortwave,
     - Solar irradiance components (direct, diffuse, reflected)
     - Temperature effects on panel efficiency
     
+    All per-hour inputs are NumPy arrays of equal length and are processed
+    in one vectorized pass.
+    
     Parameters:
     -----------
     lat, lon : float
@@ -257,124 +316,127 @@ def calculate_power(lat, lon, azimuth, tilt, direct_normal, diffuse, shortwave,
         Panel azimuth angle (0=North, 180=South)
     tilt : float
         Panel tilt angle from horizontal (0=flat, 90=vertical)
-    direct_normal : float
+    direct_normal : ndarray
         Direct Normal Irradiance (DNI) in W/m²
-    diffuse : float
+    diffuse : ndarray
         Diffuse Horizontal Irradiance (DHI) in W/m²
-    shortwave : float
+    shortwave : ndarray
         Global Horizontal Irradiance (GHI) in W/m²
-    timestamp : datetime
-        Current time for sun position calculation
-    temperature : float
+    timestamps : pandas.DatetimeIndex
+        Times for sun position calculation
+    temperature : ndarray
         Ambient temperature in °C
         
     Returns:
     --------
-    float : Power output in Watts
+    ndarray : Power output in Watts for each hour
     """
     
-    # Calculate sun position
-    day_of_year = timestamp.timetuple().tm_yday
-    hour = timestamp.hour + timestamp.minute / 60.0
+    # Calculate sun position inputs
+    day_of_year = timestamps.dayofyear.to_numpy()
+    hour = timestamps.hour.to_numpy() + timestamps.minute.to_numpy() / 60.0
     
-    # Solar declination: Earth's tilt relative to sun
-    # Varies between +23.45° (summer solstice) and -23.45° (winter solstice)
-    declination = 23.45 * math.sin(math.radians((284 + day_of_year) * 360.0 / 365))
-    
-    # Hour angle: Sun's position relative to solar noon
-    # Each hour = 15° of Earth's rotation (360°/24h = 15°/h)
-    hour_angle = (hour - 12) * 15
-    
-    # Solar elevation
-    elevation = math.degrees(math.asin(
-        math.sin(math.radians(declination)) * math.sin(math.radians(lat)) +
-        math.cos(math.radians(declination)) * math.cos(math.radians(lat)) * 
-        math.cos(math.radians(hour_angle))
-    ))
-    
-    if elevation <= 0:
-        return 0  # Sun below horizon
-    
-    # Solar azimuth (simplified)
-    solar_azimuth = math.degrees(math.atan2(
-        -math.sin(math.radians(hour_angle)),
-        math.tan(math.radians(declination)) * math.cos(math.radians(lat)) -
-        math.sin(math.radians(lat)) * math.cos(math.radians(hour_angle))
-    ))
-    if solar_azimuth < 0:
-        solar_azimuth += 360
-    
-    # Calculate angle of incidence
-    angle_of_incidence = calculate_angle_of_incidence(
-        solar_azimuth, elevation, azimuth, tilt
-    )
-    
-    cosine_factor = max(0, math.cos(math.radians(angle_of_incidence)))
-    
-    # Total radiation on tilted panel surface
-    # Three components of solar radiation:
-    # 1. Direct beam radiation: DNI * cos(angle_of_incidence)
-    # 2. Diffuse sky radiation: DHI * view_factor_sky
-    # 3. Ground reflected radiation: GHI * albedo * view_factor_ground
-    total_radiation = (
-        direct_normal * cosine_factor +                              # Direct component
-        diffuse * (1 + math.cos(math.radians(tilt))) / 2 +         # Diffuse component
-        shortwave * 0.2 * (1 - math.cos(math.radians(tilt))) / 2   # Reflected (albedo=0.2)
-    )
-    
-    # Temperature effect on panel efficiency
-    # Solar panels lose efficiency as temperature increases
-    # Typical temperature coefficient: -0.4%/°C (relative to 25°C STC)
-    temp_effect = 1 + (temperature - 25) * (-0.004)
-    
-    # Power output calculation
-    # Assumptions:
-    # - 1kW rated panel capacity at STC (1000 W/m² irradiance, 25°C)
-    # - Panel area: 8 m² (based on typical 20-22% panel efficiency)
-    # - System efficiency: 95% (accounts for inverter, wiring, soiling losses)
-    # Note: total_radiation already accounts for the actual irradiance on the tilted surface
-    power = total_radiation * temp_effect * 0.95  # Output in Watts
-    
-    return max(0, power)
+    power_fn = make_power_fn(lat, azimuth, tilt)
+    return power_fn(day_of_year, hour, direct_normal, diffuse, shortwave, temperature)
 
-def calculate_angle_of_incidence(sun_azimuth, sun_elevation, panel_azimuth, panel_tilt):
-    """Calculate angle between sun vector and panel normal"""
-    
-    # Convert to radians
-    sa = math.radians(sun_azimuth)
-    se = math.radians(sun_elevation)
-    pa = math.radians(panel_azimuth)
-    pt = math.radians(panel_tilt)
+def make_power_fn(lat, azimuth, tilt):
+    """
+    Build the numeric core of calculate_power for one location and panel.
     
-    # Calculate angle between sun vector and panel normal
-    cos_incidence = (math.sin(se) * math.cos(pt) +
-                    math.cos(se) * math.sin(pt) * math.cos(sa - pa))
+    Everything that depends only on lat, azimuth and tilt (and the per-day
+    declination table) is computed here once. The returned function
+    power_fn(day_of_year, hour, direct_normal, diffuse, shortwave,
+    temperature) takes only NumPy arrays and does the per-hour work.
+    """
     
-    # Clamp to [-1, 1] to avoid numerical errors
-    cos_incidence = max(-1, min(1, cos_incidence))
+    # Solar declination: Earth's tilt relative to sun
+    # Varies between +23.45° (summer solstice) and -23.45° (winter solstice)
+    # It only depends on the day, so build one table entry per day of year
+    # and look the hours up in it
+    table_days = np.arange(367)
+    declination_table = np.radians(EARTH_TILT * np.sin(np.radians((284 + table_days) * 360.0 / 365)))
+    sin_decl_table = np.sin(declination_table)
+    cos_decl_table = np.cos(declination_table)
+    tan_decl_table = np.tan(declination_table)
+    
+    # Location and panel orientation terms
+    sin_lat = np.sin(np.radians(lat))
+    cos_lat = np.cos(np.radians(lat))
+    panel_azimuth = np.radians(azimuth)
+    sin_tilt = np.sin(np.radians(tilt))
+    cos_tilt = np.cos(np.radians(tilt))
+    sky_view = (1 + cos_tilt) / 2                 # Share of the sky the panel sees
+    ground_view = ALBEDO * (1 - cos_tilt) / 2     # Reflected share of the ground
+    
+    def power_fn(day_of_year, hour, direct_normal, diffuse, shortwave, temperature):
+        # Hour angle: Sun's position relative to solar noon
+        # Each hour = 15° of Earth's rotation (360°/24h = 15°/h)
+        hour_angle = np.radians((hour - 12) * 15)
+        cos_ha = np.cos(hour_angle)
+        
+        # Solar elevation, kept as its sine
+        sin_elevation = (sin_decl_table[day_of_year] * sin_lat +
+                         cos_decl_table[day_of_year] * cos_lat * cos_ha)
+        
+        # No output while the sun is below the horizon, so the rest of the
+        # calculation only runs for daylight hours
+        power = np.zeros(len(sin_elevation))
+        daylight = np.flatnonzero(sin_elevation > 0)
+        sin_elevation = sin_elevation[daylight]
+        sin_ha, cos_ha = np.sin(hour_angle[daylight]), cos_ha[daylight]
+        tan_decl = tan_decl_table[day_of_year[daylight]]
+        direct_normal, diffuse = direct_normal[daylight], diffuse[daylight]
+        shortwave, temperature = shortwave[daylight], temperature[daylight]
+        
+        # The elevation lies in [-90°, 90°], so its cosine is never negative
+        cos_elevation = np.sqrt(1 - sin_elevation * sin_elevation)
+        
+        # Solar azimuth (simplified), in radians
+        solar_azimuth = np.arctan2(-sin_ha, tan_decl * cos_lat - sin_lat * cos_ha)
+        
+        # Angle of incidence between sun vector and panel normal, as its cosine
+        cos_incidence = (sin_elevation * cos_tilt +
+                         cos_elevation * sin_tilt * np.cos(solar_azimuth - panel_azimuth))
+        
+        cosine_factor = np.clip(cos_incidence, 0, 1)
+        
+        # Total radiation on tilted panel surface
+        # Three components of solar radiation:
+        # 1. Direct beam radiation: DNI * cos(angle_of_incidence)
+        # 2. Diffuse sky radiation: DHI * view_factor_sky
+        # 3. Ground reflected radiation: GHI * albedo * view_factor_ground
+        total_radiation = (
+            direct_normal * cosine_factor +         # Direct component
+            diffuse * sky_view +                    # Diffuse component
+            shortwave * ground_view                 # Reflected component
+        )
+        
+        # Temperature effect on panel efficiency
+        # Solar panels lose efficiency as temperature increases
+        # Typical temperature coefficient: -0.4%/°C (relative to 25°C STC)
+        temp_effect = 1 + (temperature - 25) * TEMP_COEFFICIENT
+        
+        # Power output calculation
+        # Assumptions:
+        # - 1kW rated panel capacity at STC (1000 W/m² irradiance, 25°C)
+        # - Panel area: 8 m² (based on typical 20-22% panel efficiency)
+        # - System efficiency: 95% (accounts for inverter, wiring, soiling losses)
+        # Note: total_radiation already accounts for the actual irradiance on the tilted surface
+        power[daylight] = np.maximum(0, total_radiation * temp_effect * SYSTEM_EFFICIENCY)  # Output in Watts
+        
+        return power
     
-    return math.degrees(math.acos(cos_incidence))
+    return power_fn
 
 def get_direction(azimuth):
     """Convert azimuth to compass direction"""
-    if azimuth >= 337.5 or azimuth < 22.5:
-        return "North"
-    elif azimuth >= 22.5 and azimuth < 67.5:
-        return "Northeast"
-    elif azimuth >= 67.5 and azimuth < 112.5:
-        return "East"
-    elif azimuth >= 112.5 and azimuth < 157.5:
-        return "Southeast"
-    elif azimuth >= 157.5 and azimuth < 202.5:
-        return "South"
-    elif azimuth >= 202.5 and azimuth < 247.5:
-        return "Southwest"
-    elif azimuth >= 247.5 and azimuth < 292.5:
-        return "West"
-    elif azimuth >= 292.5 and azimuth < 337.5:
-        return "Northwest"
-    else:
-        return "Unknown"
+    # Each direction covers a 45° sector centred on its bearing
+    return COMPASS_DIRECTIONS[int((azimuth + 22.5) % 360 // 45)]
+
+def get_direction_arr(azimuth):
+    """Convert an array of azimuths to compass directions"""
+    sectors = (np.mod(np.asarray(azimuth) + 22.5, 360) // 45).astype(np.int32)
+    return np.take(COMPASS_DIRECTIONS, sectors)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file